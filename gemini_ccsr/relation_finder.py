@@ -1,8 +1,10 @@
-import time
-
+import numpy as np
 import pandas as pd
 from tqdm import tqdm
 
+# CCSR category columns of the official CCSR mapping file
+CCSR_COLS = ['ccsr_{}'.format(i) for i in range(1, 7)]
+
 
 def get_direct_unmapped(icd, ccsr):
 
@@ -74,13 +76,12 @@ def get_direct_unmapped(icd, ccsr):
 
     """
     print('1) Getting direct mapping for existing codes in official CCSR.')
-    direct_attempt = pd.merge(ccsr, icd, how='right', on='icd')
-    direct_attempt = direct_attempt.where(pd.notnull(direct_attempt), None)
-    direct = direct_attempt[
-        direct_attempt['ccsr_1'].notna()
-    ].sort_values('icd').rename(
+    # codes are unique in the official CCSR file, so the lookup is a plain reindex instead of a join
+    direct_attempt = ccsr.set_index('icd').reindex(icd['icd']).reset_index()
+    is_direct = direct_attempt['ccsr_1'].notna().to_numpy()
+    direct = direct_attempt[is_direct].sort_values('icd').rename(
         columns={'icd': 'queried_icd'}).reset_index(drop=True)
-    unmapped = direct_attempt[direct_attempt['ccsr_1'].isna()][['icd']]
+    unmapped = icd.loc[~is_direct, ['icd']]
     return direct, unmapped
 
 
@@ -207,185 +208,57 @@ def get_predicted(unmapped, ccsr, verbose):
     """
 
     # %% PREDICTIONS BASED ON CLOSELY RELATED CODES
-    ccsr_colnames = ['ccsr_{}'.format(i) for i in range(1, 7)]
 
-    # Get codes that are unmapped after direct mapping
-    related_close = unmapped.sort_values('icd')
-    related_close[[
-        'deciding_relationship', 'ccsr_1', 'ccsr_2', 'ccsr_3', 'ccsr_4', 'ccsr_5', 'ccsr_6', 'related_codes']] = None
+    # build lookup structures over the official CCSR file once for all queried codes
+    ccsr_index = get_ccsr_index(ccsr)
 
-    closefam_resolved = pd.DataFrame(columns=['ccsr_1', 'ccsr_2', 'ccsr_3', 'ccsr_4', 'ccsr_5', 'ccsr_6',
-                                              'deciding_relationship', 'queried_icd', 'related_codes'])
-    closefam_unresolved = pd.DataFrame([])
-    closefam_failed = pd.DataFrame(columns=['queried_icd'])
+    # Get codes that are unmapped after direct mapping
+    related_close = unmapped['icd'].sort_values().to_list()
 
     if verbose:
-        print('2) Inferring mappings based on ICD codes\' close relatives.')
-        time.sleep(1)
-        iterator = tqdm(related_close['icd'])
-    else:
-        iterator = related_close['icd']
-
-    # loop through each unmapped ICD code and check agreement among closely related codes' CCSR categories
-    # starting with children, then siblings, then parents
-    for icd in iterator:
-
-        icd_related = get_closely_related(icd, ccsr, verbose)
-        automatic = False
-
-        icd_relation_temp = pd.DataFrame([])  # keep track of all categories that occured among any close relatives
-
-        if not icd_related.empty:  # if any close relationships found
-            for relation in ['Children', 'Siblings', 'Parents']:
-                icd_relation = icd_related[icd_related['relationship'] == relation]
-                if len(icd_relation) == 0:  # check if close family member exists, if not, check next close family group
-                    continue
-
-                # keep track of all categories that occured among any close relatives
-                icd_relation_temp = pd.concat([icd_relation_temp, icd_relation])
-
-                code_counts = icd_relation[
-                    ccsr_colnames].stack().value_counts()
+        # flush so that the message is printed before the progress bar
+        print('2) Inferring mappings based on ICD codes\' close relatives.', flush=True)
 
-                # identify CCSR1-6 categories that match across all children/sibl/parent codes
-                agreed_codes = code_counts[
-                    code_counts == len(icd_relation)].index.to_list()
+    # find all children/siblings/parents of all unmapped codes and check agreement among their CCSR categories
+    # in one go, starting with children, then siblings, then parents
+    icd_related = get_closely_related(related_close, ccsr_index, verbose)
+    closefam_resolved, closefam_unresolved = get_fam_agree(icd_related, ['Children', 'Siblings', 'Parents'])
+    closefam_unresolved['relationship'] = 'Close'
 
-                if agreed_codes:
-                    agreed_codes.extend((6 - len(agreed_codes))*[None])
-
-                    # Create new dataframe with automatic code
-                    res = pd.DataFrame({'queried_icd': icd,
-                                        'deciding_relationship': relation,
-                                        'related_codes': [list(
-                                           icd_related.loc[icd_related['relationship'] == relation, 'icd'].values)]})
-
-                    res.loc[0, ['ccsr_1', 'ccsr_2', 'ccsr_3', 'ccsr_4', 'ccsr_5', 'ccsr_6']] = agreed_codes
-
-                    closefam_resolved = pd.concat([closefam_resolved, res])
-
-                    automatic = True
-                    break
-
-            # if no category agreement found, get all unique categories and percentage of overlap across all relationship
-            if not automatic and not icd_relation_temp.empty:
-                # for each category among any close family members, get percentage of shared
-                code_perc = pd.Series(
-                    100*icd_relation_temp[ccsr_colnames].stack().value_counts() /
-                    len(icd_relation_temp)).to_frame(name='prct_fam_agree').round(decimals=2)
-                code_perc['queried_icd'] = icd
-                code_perc.sort_values(by=['prct_fam_agree'], ascending=False)
-
-                if len(code_perc) == 0:  # if no categories that are shared by at least 5% of related codes, return as failed
-                    closefam_failed = pd.concat([closefam_failed, pd.DataFrame({'queried_icd': [icd]})])
-                else:  # add any shared categories among related codes
-                    code_perc['relationship'] = 'Close'
-                    closefam_unresolved = pd.concat([closefam_unresolved, code_perc])
-
-        else:  # if no close relationships found at all
-            closefam_failed = pd.concat([closefam_failed, pd.DataFrame({'queried_icd': [icd]})])
-
-    if not closefam_unresolved.empty:
-        closefam_unresolved = closefam_unresolved.reset_index(drop=False).rename(
-            columns={'index': 'ccsr_1'}).loc[:, ['queried_icd', 'ccsr_1', 'prct_fam_agree', 'relationship']]
+    # codes without any close relationships are checked for distant relationships
+    closefam_found = set(closefam_resolved['queried_icd']) | set(closefam_unresolved['queried_icd'])
+    closefam_failed = [icd for icd in related_close if icd not in closefam_found]
 
     # %% PREDICTIONS BASED ON DISTANTLY RELATED CODES
 
-    distfam_resolved = pd.DataFrame(columns=[
-        'ccsr_1', 'ccsr_2', 'ccsr_3', 'ccsr_4', 'ccsr_5', 'ccsr_6', 'deciding_relationship', 'queried_icd', 'related_codes'])
+    distfam_resolved = pd.DataFrame(columns=CCSR_COLS + ['deciding_relationship', 'queried_icd', 'related_codes'])
     distfam_unresolved = pd.DataFrame([])
     distfam_failed = pd.DataFrame(columns=['queried_icd'])
 
-    if not closefam_failed.empty:
-
-        # Get codes that are still failed based on close family relationships and check for distant relationships
-        related_dist = closefam_failed.sort_values('queried_icd').rename(columns={'queried_icd': 'icd'})
-        related_dist[[
-            'deciding_relationship', 'ccsr_1', 'ccsr_2', 'ccsr_3', 'ccsr_4', 'ccsr_5', 'ccsr_6', 'related_codes']] = None
+    if closefam_failed:
 
         if verbose:
-            print('3) Inferring mappings based on ICD codes\' distant relatives.')
-            time.sleep(1)
-            iterator = tqdm(related_dist['icd'])
-        else:
-            iterator = related_dist['icd']
+            print('3) Inferring mappings based on ICD codes\' distant relatives.', flush=True)
 
-        # loop through each unmapped ICD code and check agreement among distantly related codes' CCSR categories
+        # check agreement among distantly related codes' CCSR categories
         # starting with half-siblings, then cousins, then extended family
-        # break as soon as any relationship type was found (only closest type of distant relationships contributes to mapping)
-        for icd in iterator:
-
-            icd_related = get_distantly_related(icd, ccsr, verbose)  # get related codes of queried_icd code
-            automatic = False
-
-            icd_relation_temp = pd.DataFrame([])  # keep track of all categories that occured among any close relatives
-
-            if not icd_related.empty:  # if any distant relationships found
-                for relation in ['Half-Siblings', 'Cousins', 'Extended Family']:
-                    icd_relation = icd_related[icd_related['relationship'] == relation]
-                    # check if distant family member exists, if not, check next distant family group
-                    if len(icd_relation) == 0:
-                        continue
-
-                    if icd_relation_temp.empty:
-                        # DIFFERENCE TO CLOSE relationships: Only include categories from 'closest' distant family group
-                        # (e.g., if half-siblings exist, only include those and ignore cousins/extended family)
-                        # keep track of all categories that occured among any distant relatives
-                        icd_relation_temp = pd.concat([icd_relation_temp, icd_relation])
-
-                    code_counts = icd_relation[
-                        ccsr_colnames].stack().value_counts()
-
-                    # identify CCSR1-6 categories that match across all half-siblings/cousins/ext. fam. codes
-                    agreed_codes = code_counts[
-                        code_counts == len(icd_relation)].index.to_list()
-
-                    if agreed_codes:
-                        agreed_codes.extend((6 - len(agreed_codes))*[None])
-
-                        # Create new dataframe with automatic code
-                        res = pd.DataFrame({'queried_icd': icd,
-                                            'deciding_relationship': relation,
-                                            'related_codes': [list(icd_related.loc[
-                                                icd_related['relationship'] == relation, 'icd'].values)]})
-
-                        res.loc[0, ['ccsr_1', 'ccsr_2', 'ccsr_3', 'ccsr_4', 'ccsr_5', 'ccsr_6']] = agreed_codes
-
-                        distfam_resolved = pd.concat([distfam_resolved, res])
-                        automatic = True
-
-                    if len(icd_relation) > 0:
-                        # for distantly related codes only: break loop right after 1st type of relationship was identified
-                        break
-
-                # if no category agreement found, get all unique categories and percentage of overlap across all relationships
-                if not automatic and not icd_relation_temp.empty:
-                    # for each category among any distant family members, get percentage of shared
-                    code_perc = pd.Series(
-                        100*icd_relation_temp[ccsr_colnames].stack().value_counts() /
-                        len(icd_relation_temp)).to_frame(name='prct_fam_agree').round(decimals=2)
-                    code_perc['queried_icd'] = icd
-
-                    # if no categories that are shared by at least 5% of related codes, return as failed
-                    if len(code_perc) == 0:
-                        distfam_failed = pd.concat([distfam_failed, pd.DataFrame({'queried_icd': [icd]})])
-                    else:  # add any found categories shared among related codes
-                        code_perc['relationship'] = 'Distant'
-                        distfam_unresolved = pd.concat([distfam_unresolved, code_perc])
-
-            else:  # if no distant relationships found at all
-                distfam_failed = pd.concat([distfam_failed, pd.DataFrame({'queried_icd': [icd]})])
-
-        if not distfam_unresolved.empty:
-            distfam_unresolved = distfam_unresolved.reset_index(drop=False).rename(
-                columns={'index': 'ccsr_1'}).loc[:, ['queried_icd', 'ccsr_1', 'prct_fam_agree', 'relationship']]
+        # DIFFERENCE TO CLOSE relationships: Only include categories from 'closest' distant family group
+        # (e.g., if half-siblings exist, only include those and ignore cousins/extended family)
+        icd_related = get_distantly_related(closefam_failed, ccsr_index, verbose)
+
+        distfam_resolved, distfam_unresolved = get_fam_agree(
+            icd_related, ['Half-Siblings', 'Cousins', 'Extended Family'])
+        distfam_unresolved['relationship'] = 'Distant'
+
+        distfam_found = set(distfam_resolved['queried_icd']) | set(distfam_unresolved['queried_icd'])
+        distfam_failed = pd.DataFrame(
+            {'queried_icd': [icd for icd in closefam_failed if icd not in distfam_found]}, dtype=object)
 
     # %% MERGE CLOSELY/DISTANTLY RELATED & RESOLVED CODES, RETURN WITH UNRESOLVED & FAILED CODES
     automatic = pd.concat([closefam_resolved,
                            distfam_resolved]).reset_index(drop=True)
 
-    automatic = automatic[['queried_icd', 'deciding_relationship', 'ccsr_1',
-                           'ccsr_2', 'ccsr_3', 'ccsr_4', 'ccsr_5', 'ccsr_6', 'related_codes']]
+    automatic = automatic[['queried_icd', 'deciding_relationship'] + CCSR_COLS + ['related_codes']]
 
     automatic.sort_values(["queried_icd"], axis=0, ascending=[True], inplace=True, ignore_index=True)
 
@@ -406,7 +279,354 @@ def get_predicted(unmapped, ccsr, verbose):
     return automatic, semiautomatic, failed
 
 
-def get_closely_related(unmapped, ccsr, verbose):
+def get_ccsr_index(ccsr):
+    """Precomputes lookup structures over the official CCSR mapping file so
+    that related codes can be found without rescanning `ccsr` for every
+    queried ICD-10 code.
+
+    Parameters
+    ----------
+    ccsr : pd.DataFrame
+        DataFrame containing the official mappings published by CCSR.
+        Must have the following columns:
+
+        =============  =======================================
+        icd            ICD-10 codes (as `str`)
+        ccsr_def       default CCSR category (as `str`)
+        ccsr_1         CCSR category 1 (as `str`)
+        ccsr_2         CCSR category 2 (as `str`)
+        ccsr_3         CCSR category 3 (as `str`)
+        ccsr_4         CCSR category 4 (as `str`)
+        ccsr_5         CCSR category 5 (as `str`)
+        ccsr_6         CCSR category 6 (as `str`)
+        =============  =======================================
+
+    Returns
+    -------
+    ccsr_index : dict
+        Dictionary with the following entries:
+
+        ==============  ==================================================
+        ccsr            The `icd` and `ccsr_1` - `ccsr_6` columns of the
+                        `ccsr` input, with a fresh `RangeIndex` so that row
+                        labels and row positions coincide. `ccsr_1` -
+                        `ccsr_6` share one categorical dtype, so each CCSR
+                        category is stored as a small integer code
+        icd_len         Number of characters of each ICD-10 code (as
+                        `np.ndarray` of `int8`)
+        icd_rows        Maps each ICD-10 code to its row positions (used
+                        to find Parents)
+        icd_last2       Last 2 characters of each ICD-10 code as integers,
+                        or -1 if they are not digits (as `np.ndarray` of
+                        `int16`, used to find Half-Siblings)
+        prefix_rows     Prefix trie over the ICD-10 codes, flattened into
+                        a dictionary: maps each prefix to the row positions
+                        of all codes that start with it (used to find
+                        Children, Siblings, and Parents)
+        halfsib_rows    Maps all but the last 2 characters of the ICD-10
+                        codes ending in 2 digits to the row positions of
+                        these codes, sorted by their last 2 digits (used
+                        to find Half-Siblings)
+        prefix3         Maps the first 3 characters of the ICD-10 codes
+                        to the row positions of all codes starting with
+                        them (used to find Cousins)
+        prefix2         Maps the first 2 characters of the ICD-10 codes
+                        to the row positions of all codes starting with
+                        them (used to find Extended Family)
+        ==============  ==================================================
+
+    """
+    ccsr = ccsr[['icd'] + CCSR_COLS].reset_index(drop=True)
+    # all CCSR columns share the same categories, so that their codes can be compared across columns
+    ccsr_dtype = pd.CategoricalDtype(pd.Series(ccsr[CCSR_COLS].to_numpy().ravel()).dropna().unique())
+    ccsr[CCSR_COLS] = ccsr[CCSR_COLS].astype(ccsr_dtype)
+    icd_len = ccsr['icd'].str.len().fillna(0).to_numpy(dtype=np.int8)
+    all_rows = np.arange(len(ccsr), dtype=np.int32)
+    icd_rows = get_row_groups(ccsr['icd'].to_numpy(), all_rows)
+
+    # last 2 characters of each code as an integer (-1 if they are not digits)
+    last2 = ccsr['icd'].str[-2:]
+    is_digit = last2.str.isdigit().fillna(False).to_numpy(dtype=bool)
+    icd_last2 = np.full(len(ccsr), -1, dtype=np.int16)
+    icd_last2[is_digit] = last2[is_digit].astype(int)
+
+    # each node of the trie is keyed by its prefix and holds the rows of all codes below it
+    prefix_rows = {}
+    for str_len in range(1, icd_len.max(initial=0) + 1):
+        rows = all_rows[icd_len >= str_len]
+        prefix_rows.update(get_row_groups(ccsr['icd'].str[:str_len].to_numpy()[rows], rows))
+
+    # Half-Sibling candidates (at least 5 characters, last 2 are digits) grouped by all but their
+    # last 2 characters, and sorted by their last 2 digits within each group
+    rows = all_rows[(icd_len >= 5) & (icd_last2 >= 0)]
+    rows = rows[np.argsort(icd_last2[rows], kind='stable')]
+    halfsib_rows = get_row_groups(ccsr['icd'].str[:-2].to_numpy()[rows], rows)
+
+    ccsr_index = {
+        'ccsr': ccsr,
+        'icd_len': icd_len,
+        'icd_rows': icd_rows,
+        'icd_last2': icd_last2,
+        'prefix_rows': prefix_rows,
+        'halfsib_rows': halfsib_rows,
+        'prefix3': get_row_groups(ccsr['icd'].str[:3].to_numpy(), all_rows),
+        'prefix2': get_row_groups(ccsr['icd'].str[:2].to_numpy(), all_rows),
+    }
+    return ccsr_index
+
+
+def get_row_groups(keys, rows):
+    """Groups row positions by key.
+
+    Parameters
+    ----------
+    keys : np.ndarray
+        Key (e.g., ICD-10 code prefix) of each row. Rows with missing keys
+        are left out.
+
+    rows : np.ndarray
+        Row positions (as `int32`).
+
+    Returns
+    -------
+    row_groups : dict
+        Maps each key to the positions of all rows with that key (as
+        `np.ndarray` of `int32`, in the same order as in `rows`).
+
+    """
+    return {key: rows[pos] for key, pos in pd.Series(rows).groupby(keys).indices.items()}
+
+
+def get_related(unmapped, ccsr_index, relation_funcs, verbose, closest_only=False):
+    """Finds the related codes of each given ICD-10 code for each of the
+    given relationships and returns their CCSR categories from the official
+    CCSR mapping file. Shared by `get_closely_related` and
+    `get_distantly_related`.
+
+    Parameters
+    ----------
+    unmapped : list of str
+        ICD-10 codes that could not be mapped directly.
+
+    ccsr_index : dict
+        Lookup structures over the official CCSR mapping file, as
+        returned by `get_ccsr_index`.
+
+    relation_funcs : list of tuple
+        `(relationship, func)` pairs, where `func(icd, ccsr_index)` returns
+        the row positions of the related codes (e.g., `('Children',
+        get_children)`).
+
+    verbose : bool
+        If True, progress bars are printed.
+
+    closest_only : bool
+        If True, only the related codes of the first relationship (in the
+        order of `relation_funcs`) that has any related codes are returned
+        for each ICD-10 code, and the remaining relationships are not
+        searched.
+
+    Returns
+    -------
+    related_df: pd.DataFrame
+        Related codes of the unmapped ICD-10 codes, as returned by
+        `get_related_df`.
+
+    """
+    related_rows = []
+    iterator = tqdm(unmapped, mininterval=0.5, smoothing=0) if verbose else unmapped
+
+    for icd in iterator:
+        for relationship, func in relation_funcs:
+            rows = func(icd, ccsr_index)
+            if rows is not None:
+                related_rows.append((icd, relationship, rows))
+                if closest_only:
+                    break
+
+    return get_related_df(related_rows, ccsr_index)
+
+
+def get_related_df(related_rows, ccsr_index):
+    """Builds the DataFrame of related codes from the row positions identified
+    by the relation lookups (e.g., `get_children`). The related codes of all
+    queried ICD-10 codes are gathered from the official CCSR mapping file in a
+    single step.
+
+    Parameters
+    ----------
+    related_rows : list of tuple
+        One `(queried_icd, relationship, rows)` tuple for each queried ICD-10
+        code and relationship that was found, where `rows` are the row
+        positions of the related codes in `ccsr_index['ccsr']`.
+
+    ccsr_index : dict
+        Lookup structures over the official CCSR mapping file, as
+        returned by `get_ccsr_index`.
+
+    Returns
+    -------
+    related_df: pd.DataFrame
+        One row per combination of queried and related code (without rows if
+        no related codes were found).
+
+        =============  ==================================================
+        queried_icd    Queried ICD-10 code (as `str`)
+        relationship   The relationship that the related ICD-10 code in
+                       the official CCSR file has to `queried_icd`
+                       (as `str`)
+        icd            Related ICD-10 code identified in official CCSR
+                       file (as `str`)
+        ccsr_1         CCSR category 1 (as `str`)
+        ccsr_2         CCSR category 2 (as `str`)
+        ccsr_3         CCSR category 3 (as `str`)
+        ccsr_4         CCSR category 4 (as `str`)
+        ccsr_5         CCSR category 5 (as `str`)
+        ccsr_6         CCSR category 6 (as `str`)
+        =============  ==================================================
+
+    """
+    queried_icds, relationships, rows = zip(*related_rows) if related_rows else ((), (), ())
+    n_rows = [len(r) for r in rows]
+    related_df = ccsr_index['ccsr'].take(np.concatenate(rows, dtype=int) if rows else []).reset_index(drop=True)
+    related_df.insert(loc=0, column='relationship', value=np.repeat(relationships, n_rows).astype(object))
+    related_df.insert(loc=0, column='queried_icd', value=np.repeat(queried_icds, n_rows).astype(object))
+    return related_df
+
+
+def get_fam_agree(related_df, relationships):
+    """Checks which CCSR categories are shared by the related codes of each
+    queried ICD-10 code. All queried codes are processed at once.
+
+    For each queried code, the relationships are checked in the order given
+    by `relationships`. If all related codes of a relationship have one or
+    more CCSR categories in common, the queried code is resolved based on
+    the first such relationship. Otherwise, the queried code is unresolved
+    and the percentage of *all* its related codes that share each candidate
+    CCSR category is returned instead.
+
+    Parameters
+    ----------
+    related_df : pd.DataFrame
+        Related codes of the queried ICD-10 codes, as returned by
+        `get_closely_related` or `get_distantly_related`.
+
+    relationships : list of str
+        Relationships in order of priority (e.g., `['Children', 'Siblings',
+        'Parents']`).
+
+    Returns
+    -------
+    resolved : pd.DataFrame
+        Queried ICD-10 codes whose CCSR categories could be inferred
+        automatically.
+
+        ======================  ===============================================
+        queried_icd             Queried ICD-10 code (as `str`)
+        deciding_relationship   The relationship whose related codes all share
+                                the CCSR categories below (as `str`)
+        related_codes           A list of all related ICD-10 codes with the
+                                `deciding_relationship` (as `list`)
+        ccsr_1                  CCSR category 1 (as `str`)
+        ccsr_2                  CCSR category 2 (as `str`)
+        ccsr_3                  CCSR category 3 (as `str`)
+        ccsr_4                  CCSR category 4 (as `str`)
+        ccsr_5                  CCSR category 5 (as `str`)
+        ccsr_6                  CCSR category 6 (as `str`)
+        ======================  ===============================================
+
+    unresolved : pd.DataFrame
+        One row for each [queried ICD-10 code, candidate CCSR category]
+        combination of codes that could not be resolved.
+
+        ===============  ======================================================
+        queried_icd      Queried ICD-10 code (as `str`)
+        ccsr_1           Candidate CCSR category (as `str`)
+        prct_fam_agree   Percentage of related codes that share the candidate
+                         CCSR category (as `num`)
+        ===============  ======================================================
+
+    """
+    keys = ['queried_icd', 'relationship']
+
+    # CCSR categories as a (related codes x 6) matrix of integer codes (-1 if missing)
+    categories = related_df['ccsr_1'].cat.categories.to_numpy()
+    codes = np.column_stack([related_df[col].cat.codes.to_numpy() for col in CCSR_COLS])
+
+    # one entry per [related code, CCSR category], in row-major order so that
+    # categories keep the order in which they first occur among related codes
+    row_idx, col_idx = np.nonzero(codes >= 0)
+    fam_id = related_df.groupby(keys, sort=False).ngroup().to_numpy()
+    query_id = related_df.groupby('queried_icd', sort=False).ngroup().to_numpy()
+
+    # number of related codes per relationship vs. number of related codes with each CCSR category
+    fam_size = np.bincount(fam_id)
+    fam_code, code_count = get_code_counts(fam_id[row_idx], codes[row_idx, col_idx], len(categories))
+    fam_code_id, ccsr_code = np.divmod(fam_code, len(categories))
+
+    # identify CCSR1-6 categories that match across all codes of a relationship,
+    # and keep only the first relationship (in order of priority) with any such categories
+    is_agreed = code_count == fam_size[fam_code_id]
+    fam_first_row = np.unique(fam_id, return_index=True)[1]
+    agreed = related_df[keys].take(fam_first_row[fam_code_id[is_agreed]]).reset_index(drop=True)
+    agreed['ccsr'] = categories[ccsr_code[is_agreed]]
+    agreed['priority'] = agreed['relationship'].map({rel: i for i, rel in enumerate(relationships)})
+    agreed = agreed[agreed['priority'] == agreed.groupby('queried_icd', sort=False)['priority'].transform('min')]
+
+    agreed['ccsr_num'] = agreed.groupby('queried_icd', sort=False).cumcount() + 1
+    resolved = agreed.pivot(index=keys, columns='ccsr_num', values='ccsr')
+    resolved = resolved.reindex(columns=range(1, len(CCSR_COLS) + 1)).set_axis(CCSR_COLS, axis=1)
+    resolved = resolved.astype(object).where(resolved.notna(), None)
+    related_codes = related_df.groupby(keys, sort=False)['icd'].agg(list).rename('related_codes')
+    resolved = resolved.join(related_codes, how='left').reset_index().rename(
+        columns={'relationship': 'deciding_relationship'})
+
+    # if no category agreement found, get percentage of all related codes that share each category
+    query_size = np.bincount(query_id)
+    query_code, code_count = get_code_counts(query_id[row_idx], codes[row_idx, col_idx], len(categories))
+    query_code_id, ccsr_code = np.divmod(query_code, len(categories))
+    query_first_row = np.unique(query_id, return_index=True)[1]
+
+    unresolved = related_df[['queried_icd']].take(query_first_row[query_code_id]).reset_index(drop=True)
+    unresolved['ccsr_1'] = categories[ccsr_code]
+    unresolved['prct_fam_agree'] = (100*code_count/query_size[query_code_id]).round(decimals=2)
+    unresolved = unresolved[~unresolved['queried_icd'].isin(resolved['queried_icd'])]
+
+    return resolved, unresolved
+
+
+def get_code_counts(group_id, ccsr_code, n_categories):
+    """Counts how often each CCSR category occurs within each group of
+    related codes.
+
+    Parameters
+    ----------
+    group_id : np.ndarray
+        Integer id of the group (e.g., queried ICD-10 code) of each entry.
+
+    ccsr_code : np.ndarray
+        Integer code of the CCSR category of each entry.
+
+    n_categories : int
+        Number of distinct CCSR categories.
+
+    Returns
+    -------
+    group_code : np.ndarray
+        Unique `group_id * n_categories + ccsr_code` combinations, in the
+        order in which they first occur.
+
+    code_count : np.ndarray
+        Number of entries with each combination.
+
+    """
+    group_code = group_id.astype(np.int64) * n_categories + ccsr_code
+    group_code, first, code_count = np.unique(group_code, return_index=True, return_counts=True)
+    order = np.argsort(first, kind='stable')
+    return group_code[order], code_count[order]
+
+
+def get_closely_related(unmapped, ccsr_index, verbose):
     """Finds any closely related codes of a given ICD-10 code and returns their
     CCSR categories from the official CCSR mapping file.
 
@@ -414,30 +634,12 @@ def get_closely_related(unmapped, ccsr, verbose):
 
     Parameters
     ----------
-    unmapped : str
-        ICD-10 code that could not be mapped directly.
+    unmapped : list of str
+        ICD-10 codes that could not be mapped directly.
 
-    ccsr : pd.DataFrame
-        DataFrame containing the official mappings published by CCSR.
-        Must have the following columns:
-
-        ==============  =================================================
-        icd             ICD-10 codes (as `str`)
-        ccsr_def        default CCSR category (as `str`)
-        ccsr_def_desc   default CCSR category description (as `str`)
-        ccsr_1          CCSR category 1 (as `str`)
-        ccsr_1_desc     CCSR category 1 description (as `str`)
-        ccsr_2          CCSR category 2 (as `str`)
-        ccsr_2_desc     CCSR category 2 description (as `str`)
-        ccsr_3          CCSR category 3 (as `str`)
-        ccsr_3_desc     CCSR category 3 description (as `str`)
-        ccsr_4          CCSR category 4 (as `str`)
-        ccsr_4_desc     CCSR category 4 description (as `str`)
-        ccsr_5          CCSR category 5 (as `str`)
-        ccsr_5_desc     CCSR category 5 description (as `str`)
-        ccsr_6          CCSR category 6 (as `str`)
-        ccsr_6_desc     CCSR category 6 description (as `str`)
-        ==============  =================================================
+    ccsr_index : dict
+        Lookup structures over the official CCSR mapping file, as
+        returned by `get_ccsr_index`.
 
     verbose : bool
         If True, progress bars are printed.
@@ -466,20 +668,11 @@ def get_closely_related(unmapped, ccsr, verbose):
         =============  ==================================================
 
     """
-    related_df = pd.DataFrame([])
-
-    for func in [get_children, get_sibs, get_parents]:
-        related = func(unmapped, ccsr)
-        if related is not None:
-            if related_df.empty:
-                related_df = related
-            else:
-                related_df = pd.concat([related_df, related])
-
-    return related_df
+    relation_funcs = [('Children', get_children), ('Siblings', get_sibs), ('Parents', get_parents)]
+    return get_related(unmapped, ccsr_index, relation_funcs, verbose)
 
 
-def get_children(icd, ccsr):
+def get_children(icd, ccsr_index):
     """Finds any Children codes of a given ICD-10 code and returns their
     CCSR categories from the official CCSR mapping file. Children codes are
     defined as ICD-10 codes in the official CCSR mapping file that contain the
@@ -491,54 +684,30 @@ def get_children(icd, ccsr):
     icd : str
         ICD-10 code that could not be mapped directly.
 
-    ccsr : pd.DataFrame
-        DataFrame containing the official mappings published by CCSR.
-        Must have the following columns:
-
-        =============  =======================================
-        icd            ICD-10 codes (as `str`)
-        ccsr_1         CCSR category 1 (as `str`)
-        ccsr_2         CCSR category 2 (as `str`)
-        ccsr_3         CCSR category 3 (as `str`)
-        ccsr_4         CCSR category 4 (as `str`)
-        ccsr_5         CCSR category 5 (as `str`)
-        ccsr_6         CCSR category 6 (as `str`)
-        =============  =======================================
+    ccsr_index : dict
+        Lookup structures over the official CCSR mapping file, as
+        returned by `get_ccsr_index`.
 
     Returns
     -------
-    related: pd.DataFrame
-        All Children codes of the unmapped ICD-10 codes and the CCSR categories of
-        each identified Child. Each row corresponds to one Child code.
-
-        =============  ==============================================
-        queried_icd    The queried ICD-10 codes given in `icd`.
-        relationship   Relationship to `queried_icd` (i.e.,
-                       "Children", as `str`)
-        icd            Children ICD-10 codes (as `str`)
-        ccsr_1         CCSR category 1 (as `str`)
-        ccsr_2         CCSR category 2 (as `str`)
-        ccsr_3         CCSR category 3 (as `str`)
-        ccsr_4         CCSR category 4 (as `str`)
-        ccsr_5         CCSR category 5 (as `str`)
-        ccsr_6         CCSR category 6 (as `str`)
-        =============  ==============================================
+    related_rows : np.ndarray
+        Row positions in `ccsr_index['ccsr']` of all Children codes of the
+        unmapped ICD-10 code. None if no Children codes were found.
 
     """
-    child = ccsr[ccsr['icd'].str.startswith(icd)]
-    if len(child) == 0:
+    # all codes in the subtree below the queried code
+    child = ccsr_index['prefix_rows'].get(icd)
+    if child is None:
         return None
+    child_len = ccsr_index['icd_len'][child]
     for gen_num in range(1, 5):
-        generation = child[child['icd'].str.len() == len(icd) + gen_num]
+        generation = child[child_len == len(icd) + gen_num]
         if len(generation) > 0:
-            related = generation.drop(columns=['ccsr_def'])
-            related.insert(loc=0, column='relationship', value='Children')
-            related.insert(loc=0, column='queried_icd', value=icd)
-            return related
+            return generation
     return None
 
 
-def get_sibs(icd, ccsr):
+def get_sibs(icd, ccsr_index):
     """Finds any Sibling codes of a given ICD-10 code and returns their
     CCSR categories from the official CCSR mapping file. Siblings are defined
     as any ICD-10 codes that have the same number of characters but differ in
@@ -548,50 +717,28 @@ def get_sibs(icd, ccsr):
     ----------
     icd : str
         ICD-10 code that could not be mapped directly.
-    ccsr : pd.DataFrame
-        DataFrame containing the official mappings published by CCSR.
-        Must have the following columns:
-
-        =============  =======================================
-        icd            ICD-10 codes (as `str`)
-        ccsr_1         CCSR category 1 (as `str`)
-        ccsr_2         CCSR category 2 (as `str`)
-        ccsr_3         CCSR category 3 (as `str`)
-        ccsr_4         CCSR category 4 (as `str`)
-        ccsr_5         CCSR category 5 (as `str`)
-        ccsr_6         CCSR category 6 (as `str`)
-        =============  =======================================
+    ccsr_index : dict
+        Lookup structures over the official CCSR mapping file, as
+        returned by `get_ccsr_index`.
 
     Returns
     -------
-    related: pd.DataFrame
-        All Sibling codes of the unmapped ICD-10 codes and the CCSR categories of
-        each identified Sibling. Each row corresponds to one Sibling code.
-
-        =============  ==============================================
-        queried_icd    The queried ICD-10 codes given in `icd`.
-        relationship   Relationship to `queried_icd` (i.e.,
-                       "Siblings", as `str`)
-        icd            Sibling ICD-10 codes (as `str`)
-        ccsr_1         CCSR category 1 (as `str`)
-        ccsr_2         CCSR category 2 (as `str`)
-        ccsr_3         CCSR category 3 (as `str`)
-        ccsr_4         CCSR category 4 (as `str`)
-        ccsr_5         CCSR category 5 (as `str`)
-        ccsr_6         CCSR category 6 (as `str`)
-        =============  ==============================================
+    related_rows : np.ndarray
+        Row positions in `ccsr_index['ccsr']` of all Sibling codes of the
+        unmapped ICD-10 code. None if no Sibling codes were found.
 
     """
-    sibs = ccsr[ccsr['icd'].str[:-1] == icd[:-1]]
+    # codes below the queried code's parent node that have the same length
+    sibs = ccsr_index['prefix_rows'].get(icd[:-1])
+    if sibs is None:
+        return None
+    sibs = sibs[ccsr_index['icd_len'][sibs] == len(icd)]
     if len(sibs) == 0:
         return None
-    related = sibs.drop(columns=['ccsr_def'])
-    related.insert(loc=0, column='relationship', value='Siblings')
-    related.insert(loc=0, column='queried_icd', value=icd)
-    return related
+    return sibs
 
 
-def get_parents(icd, ccsr):
+def get_parents(icd, ccsr_index):
     """Finds any Parent codes of a given ICD-10 code and returns their
     CCSR categories from the official CCSR mapping file. Parent codes are
     defined as ICD-10 codes in the official CCSR mapping file that are
@@ -602,51 +749,26 @@ def get_parents(icd, ccsr):
     ----------
     icd : str
         ICD-10 code that could not be mapped directly.
-    ccsr : pd.DataFrame
-        DataFrame containing the official mappings published by CCSR.
-        Must have the following columns:
-
-        =============  =======================================
-        icd            ICD-10 codes (as `str`)
-        ccsr_1         CCSR category 1 (as `str`)
-        ccsr_2         CCSR category 2 (as `str`)
-        ccsr_3         CCSR category 3 (as `str`)
-        ccsr_4         CCSR category 4 (as `str`)
-        ccsr_5         CCSR category 5 (as `str`)
-        ccsr_6         CCSR category 6 (as `str`)
-        =============  =======================================
+    ccsr_index : dict
+        Lookup structures over the official CCSR mapping file, as
+        returned by `get_ccsr_index`.
 
     Returns
     -------
-    related: pd.DataFrame
-        All Parent codes of the unmapped ICD-10 codes and the CCSR categories of
-        each identified Parent. Each row corresponds to one Parent code.
-
-        =============  ==============================================
-        queried_icd    The queried ICD-10 codes given in `icd`.
-        relationship   Relationship to `queried_icd` (i.e.,
-                       "Parents", as `str`)
-        icd            Parent ICD-10 codes (as `str`)
-        ccsr_1         CCSR category 1 (as `str`)
-        ccsr_2         CCSR category 2 (as `str`)
-        ccsr_3         CCSR category 3 (as `str`)
-        ccsr_4         CCSR category 4 (as `str`)
-        ccsr_5         CCSR category 5 (as `str`)
-        ccsr_6         CCSR category 6 (as `str`)
-        =============  ==============================================
+    related_rows : np.ndarray
+        Row positions in `ccsr_index['ccsr']` of all Parent codes of the
+        unmapped ICD-10 code. None if no Parent codes were found.
 
     """
+    # return the closest truncation of the code that is an ICD-10 code itself
     for str_len in range(len(icd) - 1, 2, -1):
-        generation = ccsr[ccsr['icd'] == icd[:str_len]]
-        if len(generation) > 0:
-            related = generation.drop(columns=['ccsr_def'])
-            related.insert(loc=0, column='relationship', value='Parents')
-            related.insert(loc=0, column='queried_icd', value=icd)
-            return related
+        generation = ccsr_index['icd_rows'].get(icd[:str_len])
+        if generation is not None:
+            return generation
     return None
 
 
-def get_distantly_related(unmapped, ccsr, verbose):
+def get_distantly_related(unmapped, ccsr_index, verbose):
     """Finds any distantly related codes of a given ICD-10 code and returns their
     CCSR categories from the official CCSR mapping file.
 
@@ -654,30 +776,12 @@ def get_distantly_related(unmapped, ccsr, verbose):
 
     Parameters
     ----------
-    unmapped : str
-        ICD-10 code that could not be mapped directly.
-
-    ccsr : pd.DataFrame
-        DataFrame containing the official mappings published by CCSR.
-        Must have the following columns:
+    unmapped : list of str
+        ICD-10 codes that could not be mapped directly.
 
-        ==============  =================================================
-        icd             ICD-10 cods (as `str`)
-        ccsr_def        default CCSR category (as `str`)
-        ccsr_def_desc   default CCSR category description (as `str`)
-        ccsr_1          CCSR category 1 (as `str`)
-        ccsr_1_desc     CCSR category 1 description (as `str`)
-        ccsr_2          CCSR category 2 (as `str`)
-        ccsr_2_desc     CCSR category 2 description (as `str`)
-        ccsr_3          CCSR category 3 (as `str`)
-        ccsr_3_desc     CCSR category 3 description (as `str`)
-        ccsr_4          CCSR category 4 (as `str`)
-        ccsr_4_desc     CCSR category 4 description (as `str`)
-        ccsr_5          CCSR category 5 (as `str`)
-        ccsr_5_desc     CCSR category 5 description (as `str`)
-        ccsr_6          CCSR category 6 (as `str`)
-        ccsr_6_desc     CCSR category 6 description (as `str`)
-        ==============  =================================================
+    ccsr_index : dict
+        Lookup structures over the official CCSR mapping file, as
+        returned by `get_ccsr_index`.
 
     verbose : bool
         If True, progress bars are printed.
@@ -685,10 +789,12 @@ def get_distantly_related(unmapped, ccsr, verbose):
     Returns
     -------
     related_df: pd.DataFrame
-        All Half-Siblings, Cousins, and Extended Family member codes of the
-        unmapped ICD-10 codes. Each row contains a unique combination of
-        `queried_icd` and any distantly related ICD-10 codes in the official
-        CCSR file.
+        The Half-Siblings, Cousins, or Extended Family member codes of the
+        unmapped ICD-10 codes. Only the closest of these relationships is
+        returned for each unmapped code (e.g., if Half-Siblings exist,
+        Cousins and Extended Family are not searched). Each row contains a
+        unique combination of `queried_icd` and any distantly related
+        ICD-10 codes in the official CCSR file.
 
         =============  ==================================================
         queried_icd    ICD-10 codes given in the `unmapped` input
@@ -707,21 +813,11 @@ def get_distantly_related(unmapped, ccsr, verbose):
         =============  ==================================================
 
     """
-
-    related_df = pd.DataFrame([])
-
-    for func in [get_halfsibs, get_cousins, get_extfam]:
-        related = func(unmapped, ccsr)
-        if related is not None:
-            if related_df.empty:
-                related_df = related
-            else:
-                related_df = pd.concat([related_df, related])
-
-    return related_df
+    relation_funcs = [('Half-Siblings', get_halfsibs), ('Cousins', get_cousins), ('Extended Family', get_extfam)]
+    return get_related(unmapped, ccsr_index, relation_funcs, verbose, closest_only=True)
 
 
-def get_halfsibs(icd, ccsr):
+def get_halfsibs(icd, ccsr_index):
     """Finds any Half-Sibling codes of a given ICD-10 code and returns their
     CCSR categories from the official CCSR mapping file. Half-Siblings are
     defined as codes with the same number of characters that can differ
@@ -733,63 +829,38 @@ def get_halfsibs(icd, ccsr):
     ----------
     icd : str
         ICD-10 code that could not be mapped directly.
-    ccsr : pd.DataFrame
-        DataFrame containing the official mappings published by CCSR.
-        Must have the following columns:
-
-        =============  =======================================
-        icd            ICD-10 codes (as `str`)
-        ccsr_1         CCSR category 1 (as `str`)
-        ccsr_2         CCSR category 2 (as `str`)
-        ccsr_3         CCSR category 3 (as `str`)
-        ccsr_4         CCSR category 4 (as `str`)
-        ccsr_5         CCSR category 5 (as `str`)
-        ccsr_6         CCSR category 6 (as `str`)
-        =============  =======================================
+    ccsr_index : dict
+        Lookup structures over the official CCSR mapping file, as
+        returned by `get_ccsr_index`.
 
     Returns
     -------
-    related: pd.DataFrame
-        All Half-Sibling codes of the unmapped ICD-10 codes and the CCSR
-        categories of each identified Half-Sibling. Each row corresponds to one
-        Half-Sibling code.
-
-        =============  ===================================================
-        queried_icd    The queried ICD-10 codes given in `icd`.
-        relationship   Relationship to `queried_icd` (i.e., "Half-Siblings",
-                       as `str`)
-        icd            Half-Sibling ICD-10 codes (as `str`)
-        ccsr_1         CCSR category 1 (as `str`)
-        ccsr_2         CCSR category 2 (as `str`)
-        ccsr_3         CCSR category 3 (as `str`)
-        ccsr_4         CCSR category 4 (as `str`)
-        ccsr_5         CCSR category 5 (as `str`)
-        ccsr_6         CCSR category 6 (as `str`)
-        =============  ===================================================
+    related_rows : np.ndarray
+        Row positions in `ccsr_index['ccsr']` of all Half-Sibling codes of the
+        unmapped ICD-10 code. None if no Half-Sibling codes were found.
 
     """
-    halfsibs = pd.DataFrame([])
-
     # check whether last 2 digits are within distance of +/- 9 of each other
-    # (only if code has at least 5 characters)
-    if len(icd) >= 5:
-        # find codes with matching first characters (at least 3) + same number of characters
-        halfsibs = ccsr[(ccsr['icd'].str[:-2] == icd[:-2]) & (ccsr['icd'].str.len() == len(icd))]
-        # check whether last 2 characters can be converted to integers
-        halfsibs = halfsibs[halfsibs['icd'].str.slice(-2).str.isdigit()]
+    # (only if code has at least 5 characters and its last 2 characters can be converted to integers)
+    prefix, last2 = icd[:-2], icd[-2:]
+    if len(icd) < 5 or not last2.isdigit():
+        return None
+    last2 = int(last2)
 
-        if len(halfsibs) > 0:  # make sure last 2 characters can be converted to integers
-            halfsibs = halfsibs[abs(halfsibs['icd'].str.slice(-2).astype(int) - int(icd[-2:])) < 10]
+    # find codes with matching first characters (at least 3) + same number of characters,
+    # whose last 2 characters can be converted to integers
+    halfsibs = ccsr_index['halfsib_rows'].get(prefix)
+    if halfsibs is None:
+        return None
 
-    if len(halfsibs) == 0:
+    # candidates are sorted by their last 2 digits, so the ones within +/- 9 are a contiguous slice
+    start, stop = np.searchsorted(ccsr_index['icd_last2'][halfsibs], [last2 - 9, last2 + 10])
+    if start == stop:
         return None
-    related = halfsibs.drop(columns=['ccsr_def'])
-    related.insert(loc=0, column='relationship', value='Half-Siblings')
-    related.insert(loc=0, column='queried_icd', value=icd)
-    return related
+    return np.sort(halfsibs[start:stop])
 
 
-def get_cousins(icd, ccsr):
+def get_cousins(icd, ccsr_index):
     """Finds any Cousin codes of a given ICD-10 code and returns their
     CCSR categories from the official CCSR mapping file. Cousins are defined
     as any ICD-10 codes that share the same first three characters, regardless
@@ -800,55 +871,22 @@ def get_cousins(icd, ccsr):
     ----------
     icd : str
         ICD-10 code that could not be mapped directly.
-    ccsr : pd.DataFrame
-        DataFrame containing the official mappings published by CCSR.
-        Must have the following columns:
-
-        =============  =======================================
-        icd            ICD-10 codes (as `str`)
-        ccsr_1         CCSR category 1 (as `str`)
-        ccsr_2         CCSR category 2 (as `str`)
-        ccsr_3         CCSR category 3 (as `str`)
-        ccsr_4         CCSR category 4 (as `str`)
-        ccsr_5         CCSR category 5 (as `str`)
-        ccsr_6         CCSR category 6 (as `str`)
-        =============  =======================================
+    ccsr_index : dict
+        Lookup structures over the official CCSR mapping file, as
+        returned by `get_ccsr_index`.
 
     Returns
     -------
-    related: pd.DataFrame
-        All Cousin codes of the unmapped ICD-10 codes and the CCSR categories of
-        each identified Cousin. Each row corresponds to one Cousin code.
-
-        =============  ==============================================
-        queried_icd    The queried ICD-10 codes given in `icd`.
-        relationship   Relationship to `queried_icd` (i.e.,
-                       "Cousins", as `str`)
-        icd            Cousin ICD-10 codes (as `str`)
-        ccsr_1         CCSR category 1 (as `str`)
-        ccsr_2         CCSR category 2 (as `str`)
-        ccsr_3         CCSR category 3 (as `str`)
-        ccsr_4         CCSR category 4 (as `str`)
-        ccsr_5         CCSR category 5 (as `str`)
-        ccsr_6         CCSR category 6 (as `str`)
-        =============  ==============================================
+    related_rows : np.ndarray
+        Row positions in `ccsr_index['ccsr']` of all Cousin codes of the
+        unmapped ICD-10 code. None if no Cousin codes were found.
 
     """
-    cousins = pd.DataFrame([])
-
     # find codes with matching first 3 characters
-    cousins = ccsr[(ccsr['icd'].str[:3] == icd[:3])]
-
-    if len(cousins) == 0:
-        return None
-    related = cousins.drop(columns=['ccsr_def'])
-    related.insert(loc=0, column='relationship', value='Cousins')
-    related.insert(loc=0, column='queried_icd', value=icd)
-
-    return related
+    return ccsr_index['prefix3'].get(icd[:3])
 
 
-def get_extfam(icd, ccsr):
+def get_extfam(icd, ccsr_index):
     """Finds any Extended Family codes of a given ICD-10 code and returns their
     CCSR categories from the official CCSR mapping file. Extended Family
     members are defined as any diagnosis codes that share the first two
@@ -859,50 +897,16 @@ def get_extfam(icd, ccsr):
     ----------
     icd : str
         ICD-10 code that could not be mapped directly.
-    ccsr : pd.DataFrame
-        DataFrame containing the official mappings published by CCSR.
-        Must have the following columns:
-
-        =============  =================================
-        icd            ICD-10 codes (as `str`)
-        ccsr_1         CCSR category 1 (as `str`)
-        ccsr_2         CCSR category 2 (as `str`)
-        ccsr_3         CCSR category 3 (as `str`)
-        ccsr_4         CCSR category 4 (as `str`)
-        ccsr_5         CCSR category 5 (as `str`)
-        ccsr_6         CCSR category 6 (as `str`)
-        =============  =================================
+    ccsr_index : dict
+        Lookup structures over the official CCSR mapping file, as
+        returned by `get_ccsr_index`.
 
     Returns
     -------
-    related: pd.DataFrame
-        All Extended Family member codes of the unmapped ICD-10 codes and the
-        CCSR categories of each identified Extended Family member. Each row
-        corresponds to one Extended Family member.
-
-        =============  ==============================================
-        queried_icd    The queried ICD-10 codes given in `icd`.
-        relationship   Relationship to `queried_icd` (i.e.,
-                       "Extended Family", as `str`)
-        icd            Extended Family member ICD-10 codes (as `str`)
-        ccsr_1         CCSR category 1 (as `str`)
-        ccsr_2         CCSR category 2 (as `str`)
-        ccsr_3         CCSR category 3 (as `str`)
-        ccsr_4         CCSR category 4 (as `str`)
-        ccsr_5         CCSR category 5 (as `str`)
-        ccsr_6         CCSR category 6 (as `str`)
-        =============  ==============================================
+    related_rows : np.ndarray
+        Row positions in `ccsr_index['ccsr']` of all Extended Family member codes of the
+        unmapped ICD-10 code. None if no Extended Family member codes were found.
 
     """
-    extfam = pd.DataFrame([])
-
-    # find codes with matching first 3 characters
-    extfam = ccsr[(ccsr['icd'].str[:2] == icd[:2])]
-
-    if len(extfam) == 0:
-        return None
-    related = extfam.drop(columns=['ccsr_def'])
-    related.insert(loc=0, column='relationship', value='Extended Family')
-    related.insert(loc=0, column='queried_icd', value=icd)
-
-    return related
+    # find codes with matching first 2 characters
+    return ccsr_index['prefix2'].get(icd[:2])
@@ -9,41 +9,42 @@ import ast
 
 
 class TestMain(unittest.TestCase):
-    ccsr = pd.read_csv(
-        'tests/test_data/clean_ccsr_v2020-3.csv', dtype=str).replace({np.nan: None})
-    direct = pd.read_csv(
-        'tests/test_data/direct.csv', dtype=str).replace({np.nan: None})
-    automatic = pd.read_csv(
-        'tests/test_data/automatic.csv', dtype=str).replace({np.nan: None})
-    automatic['related_codes'] = automatic['related_codes'].apply(lambda x: ast.literal_eval(x))
-
-    semiautomatic = pd.read_csv(
-        'tests/test_data/semiautomatic.csv', dtype={'prct_fam_agree': float}).replace({np.nan: None})
-
-    failed = pd.read_csv(
-        'tests/test_data/failed.csv', dtype=str).replace({np.nan: None})
-    icd = pd.concat(
-        [direct, automatic, semiautomatic, failed])['queried_icd'].astype(str).unique()
+
+    @classmethod
+    def setUpClass(cls):
+        cls.ccsr = pd.read_csv(
+            'tests/test_data/clean_ccsr_v2020-3.csv', dtype=str).replace({np.nan: None})
+        cls.direct = pd.read_csv(
+            'tests/test_data/direct.csv', dtype=str).replace({np.nan: None})
+        cls.automatic = pd.read_csv(
+            'tests/test_data/automatic.csv', dtype=str).replace({np.nan: None})
+        cls.automatic['related_codes'] = cls.automatic['related_codes'].apply(ast.literal_eval)
+
+        cls.semiautomatic = pd.read_csv(
+            'tests/test_data/semiautomatic.csv', dtype={'prct_fam_agree': float}).replace({np.nan: None})
+
+        cls.failed = pd.read_csv(
+            'tests/test_data/failed.csv', dtype=str).replace({np.nan: None})
+        cls.icd = pd.Series(np.concatenate(
+            [df['queried_icd'].to_numpy() for df in [cls.direct, cls.automatic, cls.semiautomatic, cls.failed]]
+        )).astype(str).unique()
+
+        cls.result = main.map_icd_to_ccsr(cls.icd, cls.ccsr, verbose=False)
 
     def test_map_icd_to_ccsr_verbose(self):
         _ = main.map_icd_to_ccsr(self.icd, self.ccsr, verbose=True)
 
     def test_map_icd_to_ccsr_direct(self):
-        direct = main.map_icd_to_ccsr(self.icd, self.ccsr, verbose=False)[0]
-        assert_frame_equal(direct, self.direct)
+        assert_frame_equal(self.result[0], self.direct)
 
     def test_map_icd_to_ccsr_automatic(self):
-        automatic = main.map_icd_to_ccsr(self.icd, self.ccsr, verbose=False)[1]
-        assert_frame_equal(automatic, self.automatic)
+        assert_frame_equal(self.result[1], self.automatic)
 
     def test_map_icd_to_ccsr_semiautomatic(self):
-        semiautomatic = main.map_icd_to_ccsr(
-            self.icd, self.ccsr, verbose=False)[2]
-        assert_frame_equal(semiautomatic, self.semiautomatic)
+        assert_frame_equal(self.result[2], self.semiautomatic)
 
     def test_map_icd_to_ccsr_failed(self):
-        failed = main.map_icd_to_ccsr(self.icd, self.ccsr, verbose=False)[3]
-        assert_frame_equal(failed, self.failed)
+        assert_frame_equal(self.result[3], self.failed)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,62 @@
+import unittest
+
+import pandas as pd
+from gemini_ccsr import relation_finder
+
+
+class TestRelationFinder(unittest.TestCase):
+    ccsr = pd.read_csv('tests/test_data/clean_ccsr_v2020-3.csv', dtype='str')
+    ccsr = ccsr.drop(columns=['icd_description'])
+    ccsr_index = relation_finder.get_ccsr_index(ccsr)
+
+    def related_icd(self, rows):
+        return self.ccsr_index['ccsr']['icd'].take(rows).to_list()
+
+    def test_get_children(self):
+        rows = relation_finder.get_children('A418', self.ccsr_index)
+        self.assertEqual(self.related_icd(rows), ['A4181', 'A4189'])
+
+    def test_get_children_none(self):
+        self.assertIsNone(relation_finder.get_children('A4181', self.ccsr_index))
+
+    def test_get_sibs(self):
+        rows = relation_finder.get_sibs('B485', self.ccsr_index)
+        self.assertEqual(self.related_icd(rows),
+                         ['B480', 'B481', 'B482', 'B483', 'B484', 'B488'])
+
+    def test_get_parents(self):
+        rows = relation_finder.get_parents('C8808', self.ccsr_index)
+        self.assertEqual(self.related_icd(rows), ['C880'])
+
+    def test_get_halfsibs(self):
+        rows = relation_finder.get_halfsibs('E1170', self.ccsr_index)
+        self.assertIn('E1165', self.related_icd(rows))
+        self.assertNotIn('E1160', self.related_icd(rows))
+
+    def test_get_halfsibs_short(self):
+        self.assertIsNone(relation_finder.get_halfsibs('E117', self.ccsr_index))
+
+    def test_get_halfsibs_non_digit(self):
+        self.assertIsNone(relation_finder.get_halfsibs('E11A6', self.ccsr_index))
+
+    def test_get_cousins(self):
+        rows = relation_finder.get_cousins('F0159', self.ccsr_index)
+        self.assertEqual(self.related_icd(rows), ['F0150', 'F0151'])
+
+    def test_get_extfam(self):
+        rows = relation_finder.get_extfam('A970', self.ccsr_index)
+        self.assertIn('A91', self.related_icd(rows))
+        self.assertTrue(all(icd.startswith('A9') for icd in self.related_icd(rows)))
+
+    def test_get_fam_agree(self):
+        related_df = relation_finder.get_closely_related(['A418', 'C767'], self.ccsr_index, False)
+        resolved, unresolved = relation_finder.get_fam_agree(related_df, ['Children', 'Siblings', 'Parents'])
+        self.assertEqual(resolved['queried_icd'].to_list(), ['A418'])
+        self.assertEqual(resolved['deciding_relationship'].to_list(), ['Children'])
+        self.assertEqual(resolved['related_codes'].to_list(), [['A4181', 'A4189']])
+        self.assertEqual(set(unresolved['queried_icd']), {'C767'})
+        self.assertEqual(unresolved['prct_fam_agree'].max(), 80.0)
+
+
+if __name__ == '__main__':
+    unittest.main()